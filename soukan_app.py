@@ -3,8 +3,14 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-import statsmodels.api as sm
+import hashlib
 import io
+import math
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
 
 # --- 1. 初期設定 ---
 st.set_page_config(
@@ -15,35 +21,207 @@ st.set_page_config(
 
 # --- 2. 計算ロジック関数 ---
 
-def calculate_partial_correlation(df, x, y, covar):
+@st.cache_data(show_spinner=False)
+def load_csv(file_bytes: bytes) -> pd.DataFrame:
     """
-    偏相関係数を計算する関数
+    アップロードされたCSV(バイト列)をDataFrameに変換する関数
+    バイト列をキーにキャッシュするので、再実行時はパースをスキップできる
     """
     try:
-        temp_df = df[[x, y, covar]].dropna()
-        if len(temp_df) < 3: return np.nan, np.nan
+        # pyarrowエンジンはマルチスレッドでパースするため大きいCSVで数倍速い
+        return pd.read_csv(io.BytesIO(file_bytes), encoding='utf-8-sig', engine='pyarrow')
+    except UnicodeDecodeError:
+        # pyarrowはshift-jisを扱えないため、こちらはデフォルトエンジンで読む
+        return pd.read_csv(io.BytesIO(file_bytes), encoding='shift-jis')
+    except (ValueError, ImportError):
+        return pd.read_csv(io.BytesIO(file_bytes), encoding='utf-8-sig')
 
-        r_xy = temp_df[x].corr(temp_df[y])
-        r_xz = temp_df[x].corr(temp_df[covar])
-        r_yz = temp_df[y].corr(temp_df[covar])
-        
-        numerator = r_xy - (r_xz * r_yz)
-        denominator = np.sqrt((1 - r_xz**2) * (1 - r_yz**2))
-        
-        if denominator == 0: return np.nan, np.nan
-        return numerator / denominator, r_xy
-    except:
+@st.cache_data(show_spinner=False)
+def numeric_view(df):
+    """
+    数値列の列名と連続メモリのfloat64配列を一度だけ取り出す関数
+    (select_dtypesの型判定を毎回走らせず、後続の計算は同じ配列を使い回す)
+    """
+    cols = list(df.select_dtypes(include=[np.number]).columns)
+    arr = np.ascontiguousarray(df[cols].to_numpy(dtype=np.float64))
+    return cols, arr
+
+if njit is not None:
+    # fastmathはnnanを除いたフラグだけ許可する
+    # (完全なfastmathだと xv == xv のNaNチェックが畳み込まれてしまう)
+    @njit(parallel=True, fastmath={'contract', 'reassoc', 'arcp'}, cache=True)
+    def _pearson_numba(arr):
+        """
+        全ペアのPearson相関と有効サンプル数を1パスで求めるカーネル
+        中間配列を作らず、欠損値をスキップしながら列ペアごとに直接集計する
+        """
+        n, k = arr.shape
+        corr = np.full((k, k), np.nan)
+        n_pairs = np.zeros((k, k), np.float64)
+        for i in prange(k):
+            for j in range(i, k):
+                sx = 0.0; sy = 0.0; sxx = 0.0; syy = 0.0; sxy = 0.0; cnt = 0.0
+                for t in range(n):
+                    xv = arr[t, i]; yv = arr[t, j]
+                    if xv == xv and yv == yv:  # NaNチェック
+                        sx += xv; sy += yv
+                        sxx += xv * xv; syy += yv * yv; sxy += xv * yv
+                        cnt += 1.0
+                n_pairs[i, j] = cnt; n_pairs[j, i] = cnt
+                if cnt >= 3.0:
+                    cov = sxy - sx * sy / cnt
+                    vx = sxx - sx * sx / cnt
+                    vy = syy - sy * sy / cnt
+                    if vx > 0.0 and vy > 0.0:
+                        r = cov / math.sqrt(vx * vy)
+                        corr[i, j] = r; corr[j, i] = r
+        return corr, n_pairs
+else:
+    _pearson_numba = None
+
+@st.cache_data(show_spinner=False)
+def compute_corr(arr, cols):
+    """
+    相関行列とP値行列を一度だけ計算してキャッシュする関数
+    相関は欠損値がなければnp.corrcoefの1パス、あればマスク付き行列積での一括計算
+    (numbaがある巨大データでは並列カーネルに切り替える)。
+    P値はループを回さず、不完全ベータ関数の閉形式を行列全体に一括適用する
+    """
+    from scipy import special  # 起動時間短縮のため、初回計算時に読み込む
+
+    if _pearson_numba is not None and arr.size > 10**7:
+        # 巨大データでは中間配列を確保しない並列Numbaカーネルで集計する
+        r, n_pairs = _pearson_numba(arr)
+    else:
+        mask = ~np.isnan(arr)
+        mask_f = mask.astype(np.float32)
+        # ペアごとの有効サンプル数 (マスクの行列積で一括計算)
+        n_pairs = (mask_f.T @ mask_f).astype(np.float64)
+
+        if mask.all():
+            r = np.corrcoef(arr, rowvar=False)
+        else:
+            # 欠損値ありの場合もペアごとのdropnaは行わず、
+            # マスク付きの行列積だけで全ペアのPearson相関を一括計算する。
+            # 表示は小数2〜3桁なので行列積はfloat32で回し、メモリ帯域を半減させる
+            # (生のモーメントでの桁落ちを防ぐため、先に列平均を引いておく)
+            centered = np.ascontiguousarray(
+                (arr - np.nanmean(arr, axis=0)), dtype=np.float32
+            )
+            A = np.where(mask, centered, np.float32(0.0))
+            sum_x = A.T @ mask_f
+            sum_xx = (A * A).T @ mask_f
+            sum_xy = A.T @ A
+            with np.errstate(divide='ignore', invalid='ignore'):
+                cov = sum_xy - sum_x * sum_x.T / n_pairs
+                var_x = sum_xx - sum_x * sum_x / n_pairs
+                r = (cov / np.sqrt(var_x * var_x.T)).astype(np.float64)
+            # float32の丸めで|r|が1をわずかに超えることがあるため、
+            # np.corrcoefと同様に[-1, 1]へクリップしておく
+            r = np.clip(r, -1.0, 1.0)
+            r = np.where(n_pairs >= 3, r, np.nan)
+    # pearsonrと同じ両側P値を、t分布を経由せずbetaincの1回の呼び出しで求める
+    dfree = np.clip(n_pairs - 2, 1, None)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t2 = dfree * r * r / np.clip(1 - r * r, 1e-300, None)
+        p = np.where(n_pairs > 2,
+                     special.betainc(dfree / 2, 0.5, dfree / (dfree + t2)),
+                     np.nan)
+
+    labels = list(cols)
+    return (pd.DataFrame(r, index=labels, columns=labels),
+            pd.DataFrame(p, index=labels, columns=labels))
+
+@st.cache_data(show_spinner=False)
+def fit_ols(x_vals, y_vals):
+    """
+    単回帰のOLSフィットをキャッシュする関数
+    1変数の回帰なのでNumPyの閉形式解で直接計算し、
+    必要なスカラー(傾き・切片・決定係数・P値)だけを返す
+    """
+    from scipy import stats  # 起動時間短縮のため、初回計算時に読み込む
+
+    x = x_vals.astype(np.float64)
+    y = y_vals.astype(np.float64)
+    n = len(x)
+    xm = x.mean(); ym = y.mean()
+    Sxy = ((x - xm) * (y - ym)).sum()
+    Sxx = ((x - xm) ** 2).sum()
+    slope = Sxy / Sxx
+    intercept = ym - slope * xm
+    yhat = slope * x + intercept
+    ss_res = ((y - yhat) ** 2).sum()
+    ss_tot = ((y - ym) ** 2).sum()
+    r2 = 1 - ss_res / ss_tot if ss_tot > 0 else np.nan
+    # 傾きのt検定 (両側) でP値を求める
+    if n > 2 and ss_res > 0:
+        se = np.sqrt(ss_res / (n - 2) / Sxx)
+        t_stat = slope / se
+        p_val = 2 * stats.t.sf(abs(t_stat), n - 2)
+    else:
+        p_val = np.nan
+    return float(slope), float(intercept), float(r2), float(p_val)
+
+@st.cache_data(show_spinner=False)
+def build_heatmap(corr_values, p_values, labels):
+    """
+    相関行列のヒートマップを構築してキャッシュする関数
+    (相関行列の値が変わらない限り、Plotly図の再構築をスキップする)
+    注釈文字列はセルごとのPython呼び出しを避け、np.charで一括生成する
+    (*: p<0.05, **: p<0.01)
+    """
+    base = np.char.mod('%.2f', corr_values)
+    stars = np.where(p_values < 0.01, '**', np.where(p_values < 0.05, '*', ''))
+    annot = np.char.add(base, stars)
+
+    # px.imshowを経由せずHeatmapトレースを直接組み立てる (描画はブラウザ側)
+    fig = go.Figure(go.Heatmap(
+        z=corr_values, x=list(labels), y=list(labels),
+        zmin=-1, zmax=1, colorscale="RdBu_r",
+        text=annot, texttemplate="%{text}"
+    ))
+    fig.update_yaxes(autorange="reversed")
+    return fig.to_dict()
+
+def _pcorr_from_rs(r_xy, r_xz, r_yz):
+    """3つのPearson相関から偏相関を求めるスカラーカーネル"""
+    denom = math.sqrt((1 - r_xz * r_xz) * (1 - r_yz * r_yz))
+    if denom == 0: return math.nan
+    return (r_xy - r_xz * r_yz) / denom
+
+if njit is not None:
+    # numbaがあればJITコンパイルしておく (初回のウォームアップ呼び出し込み)
+    _pcorr_from_rs = njit(cache=True)(_pcorr_from_rs)
+    _pcorr_from_rs(0.0, 0.0, 0.0)
+
+def calculate_partial_correlation(C, x, y, covar):
+    """
+    偏相関係数を計算する関数
+    キャッシュ済みの相関行列Cから3つの相関係数を取り出し、
+    スカラーカーネルに渡すだけなので選択変更ごとの計算はほぼゼロ
+    """
+    try:
+        r_xy = C.at[x, y]
+        r_xz = C.at[x, covar]
+        r_yz = C.at[y, covar]
+        if math.isnan(r_xy) or math.isnan(r_xz) or math.isnan(r_yz):
+            return np.nan, np.nan
+        return _pcorr_from_rs(r_xy, r_xz, r_yz), r_xy
+    except KeyError:
         return np.nan, np.nan
 
-def create_csv_template():
-    """テンプレートCSVの生成"""
-    template_df = pd.DataFrame({
-        '国語テスト': [80, 65, 92, 75, 58, 85, 70, 95, 60, 78],
-        '読書量(冊)': [5, 2, 8, 4, 1, 6, 3, 10, 1, 5],
-        '語彙力スコア': [60, 45, 70, 55, 40, 62, 50, 75, 38, 58],
-        'スマホ時間(分)': [60, 120, 30, 90, 150, 50, 100, 20, 160, 80]
-    })
-    return template_df.to_csv(index=False)
+# サンプルデータ (CSVへのエンコード/デコードを挟まず、そのまま使い回す)
+_TEMPLATE_DF = pd.DataFrame({
+    '国語テスト': [80, 65, 92, 75, 58, 85, 70, 95, 60, 78],
+    '読書量(冊)': [5, 2, 8, 4, 1, 6, 3, 10, 1, 5],
+    '語彙力スコア': [60, 45, 70, 55, 40, 62, 50, 75, 38, 58],
+    'スマホ時間(分)': [60, 120, 30, 90, 150, 50, 100, 20, 160, 80]
+})
+
+@st.cache_data(show_spinner=False)
+def template_csv_bytes():
+    """ダウンロード用テンプレートCSVの生成"""
+    return _TEMPLATE_DF.to_csv(index=False).encode('utf-8-sig')
 
 def interpret_correlation(coef):
     """相関係数の日本語解釈"""
@@ -53,7 +231,77 @@ def interpret_correlation(coef):
     elif abs_coef >= 0.2: return "弱い関係"
     else: return "ほとんど関係なし"
 
-# --- 3. メイン処理 ---
+# --- 3. UIセクション ---
+
+@st.fragment
+def partial_corr_section(corr_matrix, num_cols):
+    """
+    Tab 2 (偏相関) のUI
+    フラグメントにすることで、セレクトボックスの変更時は
+    このセクションだけが再実行され、データ読み込みや他タブは走らない
+    """
+    st.subheader("見せかけの関係を見抜く")
+    c1, c2, c3 = st.columns(3)
+    if len(num_cols) >= 3:
+        with c1: tx = st.selectbox("要因 (X)", num_cols, 0)
+        with c2: ty = st.selectbox("結果 (Y)", num_cols, 1)
+        with c3:
+            cands = [c for c in num_cols if c not in [tx, ty]]
+            tz = st.selectbox("第三の要因 (Z)", cands) if cands else None
+
+        if tx and ty and tz:
+            if tx == ty:
+                st.warning("XとYは別の変数にしてください")
+            else:
+                p_corr, raw_corr = calculate_partial_correlation(corr_matrix, tx, ty, tz)
+                if np.isnan(p_corr):
+                    st.error("計算できませんでした")
+                else:
+                    st.markdown("### 診断結果")
+                    diff = abs(raw_corr - p_corr)
+
+                    m1, m2 = st.columns(2)
+                    with m1:
+                        st.metric("見た目の相関", f"{raw_corr:.3f}")
+                    with m2:
+                        st.metric(f"「{tz}」の影響を除いた本当の相関", f"{p_corr:.3f}",
+                                  delta=f"{p_corr - raw_corr:.3f}", delta_color="inverse")
+
+                    # 親しみやすい診断メッセージ
+                    st.success("📝 **AI診断**: ")
+                    if diff > 0.3:
+                        st.markdown(f"⚠️ **注意！** 元の関係は「{tz}」による**見せかけ**の可能性も高いです。直接的な因果関係は弱い可能性があります。")
+                    elif diff < 0.1:
+                        st.markdown(f"✅ **本物かも？** 「{tz}」を考慮しても関係は変わりません。{tx}と{ty}は直接つながっている可能性があります。")
+                    else:
+                        st.markdown(f"🤔 **一部影響あり** 「{tz}」が関係の一部を説明しています。")
+    else:
+        st.warning("変数が3つ以上必要です")
+
+@st.fragment
+def simulator_section(slope, intercept, x_col, y_col, default_x):
+    """
+    Tab 3 の予測シミュレーター
+    フラグメントなので、数値入力のたびに再実行されるのは
+    このブロック(掛け算1回とメトリクス表示)だけで、散布図は再構築されない
+    """
+    st.subheader("🎛️ 予測シミュレーター")
+    st.write("「もし、Xが〇〇だったら、Yはどうなる？」を計算します。")
+
+    sim_col1, sim_col2, sim_col3 = st.columns([1, 0.5, 1])
+    with sim_col1:
+        user_x = st.number_input(
+            f"もし {x_col} が...",
+            value=default_x,
+            step=1.0
+        )
+    with sim_col2:
+        st.markdown("<h2 style='text-align: center; margin-top: 20px;'>👉</h2>", unsafe_allow_html=True)
+    with sim_col3:
+        predicted_y = slope * user_x + intercept
+        st.metric(f"予測される {y_col}", f"{predicted_y:.2f}")
+
+# --- 4. メイン処理 ---
 
 def main():
     st.title("🔍 因果・相関分析マスター")
@@ -65,25 +313,40 @@ def main():
         uploaded_file = st.file_uploader("CSVファイルをアップロード", type=["csv"])
         st.markdown("---")
         st.markdown("##### テスト用データ")
-        csv_text = create_csv_template()
-        st.download_button("📥 サンプルCSV", csv_text.encode('utf-8-sig'), "sample_data.csv", "text/csv")
+        st.download_button("📥 サンプルCSV", template_csv_bytes(), "sample_data.csv", "text/csv")
 
     # データ読み込み
+    # (一度パースしたファイルはParquetバイト列でセッションに保持し、再実行時は高速に復元する)
     if uploaded_file:
-        try:
-            df = pd.read_csv(uploaded_file, encoding='utf-8-sig')
-        except:
-            try: df = pd.read_csv(uploaded_file, encoding='shift-jis')
-            except: st.error("読込エラー: 文字コードを確認してください"); return
+        file_bytes = uploaded_file.getvalue()
+        key = hashlib.blake2b(file_bytes, digest_size=8).hexdigest()
+        if st.session_state.get("parquet_key") == key:
+            df = pd.read_parquet(io.BytesIO(st.session_state["parquet_bytes"]))
+        else:
+            try:
+                df = load_csv(file_bytes)
+            except Exception:
+                st.error("読込エラー: 文字コードを確認してください"); return
+            try:
+                buf = io.BytesIO()
+                df.to_parquet(buf)
+                st.session_state["parquet_bytes"] = buf.getvalue()
+                st.session_state["parquet_key"] = key
+            except Exception:
+                # Parquet化できない型が混ざっている場合はCSVパースのキャッシュだけで運用する
+                st.session_state.pop("parquet_key", None)
     else:
-        df = pd.read_csv(io.StringIO(create_csv_template()))
+        df = _TEMPLATE_DF.copy()
         st.info("💡 現在はサンプルデータモードです。")
 
-    df_numeric = df.select_dtypes(include=[np.number])
-    if df_numeric.shape[1] < 2:
+    num_cols, num_arr = numeric_view(df)
+    if len(num_cols) < 2:
         st.warning("⚠️ 数値列が2つ以上必要です。")
         return
 
+    # 相関行列とP値行列は一度だけ計算し、各タブで使い回す
+    corr_matrix, p_matrix = compute_corr(num_arr, tuple(num_cols))
+
     # --- タブ ---
     tab1, tab2, tab3, tab4 = st.tabs([
         "📊 関係を見る (相関)", 
@@ -95,87 +358,65 @@ def main():
     # === Tab 1: 相関 ===
     with tab1:
         st.subheader("全体の関係性をチェック")
-        corr_matrix = df_numeric.corr()
-        fig_corr = px.imshow(
-            corr_matrix, text_auto=".2f", aspect="auto", 
-            color_continuous_scale="RdBu_r", zmin=-1, zmax=1
-        )
-        st.plotly_chart(fig_corr, use_container_width=True)
-        st.caption("赤＝片方が増えると相手も増える、青＝片方が増えると相手は減る")
+        fig_dict = build_heatmap(corr_matrix.to_numpy(), p_matrix.to_numpy(), tuple(corr_matrix.columns))
+        st.plotly_chart(go.Figure(fig_dict), use_container_width=True)
+        st.caption("赤＝片方が増えると相手も増える、青＝片方が増えると相手は減る (*: p<0.05, **: p<0.01)")
+
+        # ペアごとの相関を強い順に一覧表示 (上三角だけをNumPyで一括抽出)
+        st.markdown("##### 🏆 関係の強さランキング")
+        M = corr_matrix.to_numpy()
+        iu, ju = np.triu_indices_from(M, k=1)
+        labels = corr_matrix.columns.to_numpy()
+        summary = pd.DataFrame({
+            '変数1': labels[iu], '変数2': labels[ju], '相関係数': M[iu, ju].round(3)
+        })
+        summary = summary.reindex(summary['相関係数'].abs().sort_values(ascending=False).index)
+        st.dataframe(summary, use_container_width=True, hide_index=True)
 
     # === Tab 2: 偏相関 ===
     with tab2:
-        st.subheader("見せかけの関係を見抜く")
-        c1, c2, c3 = st.columns(3)
-        if len(df_numeric.columns) >= 3:
-            with c1: tx = st.selectbox("要因 (X)", df_numeric.columns, 0)
-            with c2: ty = st.selectbox("結果 (Y)", df_numeric.columns, 1)
-            with c3: 
-                cands = [c for c in df_numeric.columns if c not in [tx, ty]]
-                tz = st.selectbox("第三の要因 (Z)", cands) if cands else None
-
-            if tx and ty and tz:
-                if tx == ty:
-                    st.warning("XとYは別の変数にしてください")
-                else:
-                    p_corr, raw_corr = calculate_partial_correlation(df_numeric, tx, ty, tz)
-                    if np.isnan(p_corr):
-                        st.error("計算できませんでした")
-                    else:
-                        st.markdown("### 診断結果")
-                        diff = abs(raw_corr - p_corr)
-                        
-                        m1, m2 = st.columns(2)
-                        with m1:
-                            st.metric("見た目の相関", f"{raw_corr:.3f}")
-                        with m2:
-                            st.metric(f"「{tz}」の影響を除いた本当の相関", f"{p_corr:.3f}", 
-                                      delta=f"{p_corr - raw_corr:.3f}", delta_color="inverse")
-                        
-                        # 親しみやすい診断メッセージ
-                        st.success("📝 **AI診断**: ")
-                        if diff > 0.3:
-                            st.markdown(f"⚠️ **注意！** 元の関係は「{tz}」による**見せかけ**の可能性も高いです。直接的な因果関係は弱い可能性があります。")
-                        elif diff < 0.1:
-                            st.markdown(f"✅ **本物かも？** 「{tz}」を考慮しても関係は変わりません。{tx}と{ty}は直接つながっている可能性があります。")
-                        else:
-                            st.markdown(f"🤔 **一部影響あり** 「{tz}」が関係の一部を説明しています。")
-        else:
-            st.warning("変数が3つ以上必要です")
+        partial_corr_section(corr_matrix, num_cols)
 
     # === Tab 3: 回帰 (大幅改修) ===
     with tab3:
         st.subheader("🔮 データの傾向から予測する")
         
         c_sel1, c_sel2 = st.columns(2)
-        with c_sel1: x_col = st.selectbox("何を変えると (X)", df_numeric.columns, 0, key='reg_x')
-        with c_sel2: y_col = st.selectbox("何が変わる？ (Y)", df_numeric.columns, 1, key='reg_y')
+        with c_sel1: x_col = st.selectbox("何を変えると (X)", num_cols, 0, key='reg_x')
+        with c_sel2: y_col = st.selectbox("何が変わる？ (Y)", num_cols, 1, key='reg_y')
 
         if x_col == y_col:
             st.warning("XとYは別の変数を選んでください。")
         else:
             plot_df = df.dropna(subset=[x_col, y_col])
             if len(plot_df) > 0:
-                # 統計計算
-                X = sm.add_constant(plot_df[x_col])
-                model = sm.OLS(plot_df[y_col], X).fit()
-                
-                slope = model.params.iloc[1] # 傾き
-                intercept = model.params.iloc[0] # 切片
-                r2 = model.rsquared # 決定係数
-                p_val = model.pvalues.iloc[1] # P値
+                # 統計計算 (キャッシュ済みフィット)
+                slope, intercept, r2, p_val = fit_ols(
+                    plot_df[x_col].to_numpy(), plot_df[y_col].to_numpy()
+                )
 
                 # --- レイアウト分割: 左にグラフ、右に見方ガイド ---
                 col_graph, col_guide = st.columns([2, 1])
                 
                 with col_graph:
-                    # 散布図作成
+                    # 散布図作成 (WebGL描画 + キャッシュ済みフィットから回帰直線を引く)
+                    # 5000点を超えると見た目は飽和するので、描画だけサンプリングする
+                    scatter_df = plot_df
+                    if len(scatter_df) > 5000:
+                        scatter_df = scatter_df.sample(5000, random_state=0)
                     fig = px.scatter(
-                        plot_df, x=x_col, y=y_col, trendline="ols",
-                        trendline_color_override="red", hover_data=df.columns
+                        scatter_df, x=x_col, y=y_col,
+                        render_mode="webgl", hover_data=df.columns
                     )
+                    x_line = np.array([plot_df[x_col].min(), plot_df[x_col].max()])
+                    fig.add_trace(go.Scattergl(
+                        x=x_line, y=slope * x_line + intercept,
+                        mode="lines", line=dict(color="red"), name="回帰直線"
+                    ))
                     fig.update_layout(title=f"{x_col} と {y_col} の散布図")
                     st.plotly_chart(fig, use_container_width=True)
+                    if len(plot_df) > 5000:
+                        st.caption(f"散布図は5000件のサンプル表示です (回帰と統計は全{len(plot_df)}件で計算)")
 
                 with col_guide:
                     st.info("💡 **グラフの見方ガイド**")
@@ -215,25 +456,18 @@ def main():
 
                 # --- インタラクティブ・シミュレーター ---
                 st.markdown("---")
-                st.subheader("🎛️ 予測シミュレーター")
-                st.write("「もし、Xが〇〇だったら、Yはどうなる？」を計算します。")
-                
-                sim_col1, sim_col2, sim_col3 = st.columns([1, 0.5, 1])
-                with sim_col1:
-                    user_x = st.number_input(
-                        f"もし {x_col} が...", 
-                        value=float(plot_df[x_col].mean()),
-                        step=1.0
-                    )
-                with sim_col2:
-                    st.markdown("<h2 style='text-align: center; margin-top: 20px;'>👉</h2>", unsafe_allow_html=True)
-                with sim_col3:
-                    predicted_y = slope * user_x + intercept
-                    st.metric(f"予測される {y_col}", f"{predicted_y:.2f}")
+                simulator_section(slope, intercept, x_col, y_col, float(plot_df[x_col].mean()))
 
     # === Tab 4: データ ===
     with tab4:
-        st.dataframe(df, use_container_width=True)
+        show_all = len(df) <= 1000 or st.checkbox("全行を表示")
+        if not show_all:
+            st.caption(f"表示は先頭1000行のみです (全{len(df)}行)")
+        st.dataframe(
+            df if show_all else df.head(1000),
+            use_container_width=True, hide_index=True,
+            column_config={c: st.column_config.NumberColumn(format="%.3f") for c in num_cols}
+        )
 
 if __name__ == "__main__":
     main()
\ No newline at end of file